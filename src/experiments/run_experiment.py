@@ -2,22 +2,33 @@
 from __future__ import annotations
 
 import argparse
+from pathlib import Path
+from typing import Dict, List
 import uuid
 
 from game_manager.manager import GameManager
+from game_manager.scheduler import EpisodeScheduler
+from llm_runner.tokens import TokenBudget
 from state.logger import LogManager
+from state.metrics import MetricsExporter, MetricsRegistry
 from zork_api_adapter.client import ZorkEnv
+from zork_api_adapter.pool import SessionPool, worker_identities
 
 from pprint import pprint as pp
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run Zork LLM experiments")
-    parser.add_argument("--model", required=True, help="Model name (e.g., gpt-4.1-mini)")
-    parser.add_argument("--episodes", type=int, default=1, help="Number of episodes to run")
+    parser.add_argument(
+        "--model",
+        required=True,
+        nargs="+",
+        help="Model name(s) (e.g., gpt-4.1-mini); episodes are interleaved across models",
+    )
+    parser.add_argument("--episodes", type=int, default=1, help="Number of episodes to run per model")
     parser.add_argument("--max-moves", type=int, default=50, help="Max moves per episode")
     parser.add_argument("--email", required=True, help="Name for ZorkAPI to track user")
-    parser.add_argument("--rate-limit", type=int, default=1, help="Number of seconds to use as a rate limit")
+    parser.add_argument("--rate-limit", type=int, default=1, help="Minimum seconds between ZorkAPI moves, shared by all workers")
     parser.add_argument(
         "--base-url",
         type=str,
@@ -36,41 +47,159 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional run-level seed recorded in the log for reproducibility",
     )
+    parser.add_argument(
+        "--max-invalid-retries",
+        type=int,
+        default=2,
+        help="Times to re-prompt the model locally when its command fails validation",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Maximum tokens for the whole run across all models",
+    )
+    parser.add_argument(
+        "--model-token-budget",
+        action="append",
+        default=[],
+        metavar="MODEL=TOKENS",
+        help="Maximum tokens for one model; may be given once per model",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live Prometheus-style metrics on http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="Periodically rewrite this file with the same metrics",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between metrics file rewrites",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of episodes to run concurrently (each gets its own ZorkAPI identity)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="Pre-started ZorkAPI games to keep (default: workers + 1 when workers > 1, else no pool)",
+    )
     return parser.parse_args()
 
 
+def parse_model_budgets(values: List[str]) -> Dict[str, int]:
+    budgets = {}
+    for value in values:
+        model_name, sep, tokens = value.rpartition("=")
+        if not sep or not model_name or not tokens.isdigit():
+            raise SystemExit(f"Invalid --model-token-budget {value!r}; expected MODEL=TOKENS")
+        budgets[model_name] = int(tokens)
+    return budgets
+
+
 def main() -> None:
     args = parse_args()
     log_manager = LogManager(log_filename=args.log_filename)
     env = ZorkEnv(base_url=args.base_url)
-    manager = GameManager(env=env, log_manager=log_manager)
+    metrics = MetricsRegistry()
+    exporter = MetricsExporter(metrics)
+    if args.metrics_port is not None:
+        exporter.serve(args.metrics_port)
+        print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.metrics_file:
+        exporter.write_periodically(Path(args.metrics_file), interval=args.metrics_interval)
+        print(f"Metrics file: {args.metrics_file}")
+    manager = GameManager(
+        env=env,
+        log_manager=log_manager,
+        max_invalid_retries=args.max_invalid_retries,
+        metrics=metrics,
+    )
+
+    token_budget = TokenBudget(
+        run_limit=args.token_budget,
+        model_limits=parse_model_budgets(args.model_token_budget),
+    )
+    game = "zork1"
+    pool_size = args.pool_size if args.pool_size is not None else (args.workers + 1 if args.workers > 1 else 0)
+    if args.workers > 1 and pool_size < args.workers:
+        # Fewer games than workers would make concurrent episodes share one ZorkAPI game.
+        raise SystemExit(f"--pool-size ({pool_size}) must be at least --workers ({args.workers})")
+    session_pool = None
+    if pool_size > 0:
+        session_pool = SessionPool(
+            env=env,
+            game=game,
+            identities=worker_identities(args.email, pool_size),
+            metrics=metrics,
+        )
+        session_pool.start()
+    scheduler = EpisodeScheduler(
+        manager=manager,
+        token_budget=token_budget,
+        workers=args.workers,
+        session_pool=session_pool,
+    )
 
-    print(f"Model: {args.model}")
+    print(f"Model: {', '.join(args.model)}")
     print(f"Email: {args.email}")
     print(f"Rate Limit: {args.rate_limit}")
     print(f"Number of episodes: {args.episodes}")
     print(f"Max Moves: {args.max_moves}")
+    print(f"Workers: {args.workers}")
+    print(f"Session Pool: {pool_size or 'disabled'}")
+    print(f"Token Budget: {args.token_budget or 'unlimited'}")
+    for model_name, tokens in token_budget.model_limits.items():
+        print(f"Token Budget ({model_name}): {tokens}")
 
     run_id = str(uuid.uuid4())
-    results = []
-    for episode_idx in range(args.episodes):
-        result = manager.run_episode(
-            model_name=args.model,
+    try:
+        report = scheduler.run(
+            models=args.model,
+            episodes=args.episodes,
             max_moves=args.max_moves,
             rate_limit=args.rate_limit,
             run_id=run_id,
             email=args.email,
-            game="zork1",
-            episode_index=episode_idx,
+            game=game,
             seed=args.seed,
         )
-        results.append(result)
+    finally:
+        if session_pool is not None:
+            session_pool.close()
+        exporter.stop()
+    results = report.results
 
     print("=== Run summary ===")
     pp(results)
     for idx, res in enumerate(results, start=1):
-        end_state = "natural" if res.ended_naturally else "max_moves"
-        print(f"Episode {idx}: score={res.final_score} moves={res.moves} end={end_state} log={res.log_path}")
+        if res.truncated_by_budget:
+            end_state = "token_budget"
+        else:
+            end_state = "natural" if res.ended_naturally else "max_moves"
+        print(
+            f"Episode {idx}: model={res.model_name} score={res.final_score} moves={res.moves} end={end_state} "
+            f"tokens_projected={res.tokens_projected} tokens_actual={res.tokens_actual} log={res.log_path}"
+        )
+    for job in report.skipped:
+        print(f"Skipped: model={job.model_name} episode_index={job.episode_index} (token budget exhausted)")
+    for model_name, usage in scheduler.usage_summary().items():
+        print(
+            f"Tokens ({model_name}): projected={usage['projected']} actual={usage['actual']} "
+            f"charged={usage['charged']} calls={usage['calls']}"
+        )
 
 
 if __name__ == "__main__":
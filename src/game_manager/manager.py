@@ -3,15 +3,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import threading
 from typing import Dict, List, Optional
 import uuid
 
 from prompts.templates import build_prompt
 from llm_runner.runner import generate_action, LLMGeneration
+from llm_runner.tokens import TokenBudget, TokenBudgetExceeded, estimate_tokens
+from llm_runner.validator import CommandValidator
 from state.logger import LogManager
+from state.metrics import MetricsRegistry
 from zork_api_adapter.client import ZorkEnv, ZorkStepResult
+from zork_api_adapter.pool import GameLease
 
-from time import sleep
+from time import monotonic, sleep
 from pprint import pprint as pp
 
 
@@ -23,6 +28,9 @@ class EpisodeResult:
     moves: int
     ended_naturally: bool
     log_path: Path
+    tokens_projected: int = 0
+    tokens_actual: int = 0
+    truncated_by_budget: bool = False
 
 
 @dataclass
@@ -40,12 +48,106 @@ class GameState:
         self.inventory = result.inventory if result.inventory is not None else self.inventory
 
 
+def _add_tokens(first: Optional[int], second: Optional[int]) -> Optional[int]:
+    if first is None and second is None:
+        return None
+    return (first or 0) + (second or 0)
+
+
+def opening_call_tokens(model_name: str, budget: TokenBudget) -> int:
+    """Projected tokens for the first LLM call of a fresh episode."""
+    opening_prompt = build_prompt(GameState(session_id="", history=[]), model_name=model_name)
+    return estimate_tokens(opening_prompt, model_name) + budget.estimate_completion(model_name)
+
+
 class GameManager:
     """Runs a full Zork episode end-to-end."""
 
-    def __init__(self, env: ZorkEnv, log_manager: Optional[LogManager] = None):
+    def __init__(
+        self,
+        env: ZorkEnv,
+        log_manager: Optional[LogManager] = None,
+        max_invalid_retries: int = 2,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         self.env = env
         self.log_manager = log_manager or LogManager()
+        self.max_invalid_retries = max_invalid_retries
+        self.metrics = metrics or MetricsRegistry()
+        # Shared by every worker so --rate-limit caps the total request rate.
+        self._rate_lock = threading.Lock()
+        self._last_step: Optional[float] = None
+
+    def _wait_for_rate_limit(self, rate_limit: float) -> None:
+        """Block until ``rate_limit`` seconds have passed since the last step of any episode."""
+        with self._rate_lock:
+            if self._last_step is not None:
+                delay = self._last_step + rate_limit - monotonic()
+                if delay > 0:
+                    sleep(delay)
+            self._last_step = monotonic()
+
+    def _env_call(self, endpoint: str, call, *args):
+        """Time a ZorkAPI request and count it if it raises."""
+        with self.metrics.timing("zork_env_latency_seconds", "zork_env_errors_total", endpoint=endpoint):
+            return call(*args)
+
+    def _request(
+        self, prompt: str, model_name: str, budget: TokenBudget
+    ) -> Optional[LLMGeneration]:
+        """Estimate the call locally and make it only if the budget allows."""
+        projected = estimate_tokens(prompt, model_name) + budget.estimate_completion(model_name)
+        if not budget.can_afford(model_name, projected):
+            print(f"[INFO] Token budget exhausted for {model_name} (next call ~{projected} tokens)")
+            return None
+        with self.metrics.timing("zork_llm_latency_seconds", model=model_name):
+            generation = generate_action(model_name=model_name, prompt=prompt)
+        self.metrics.inc("zork_llm_calls_total", model=model_name)
+        if generation.tokens_prompt is not None:
+            self.metrics.inc("zork_tokens_total", generation.tokens_prompt, model=model_name, kind="prompt")
+        if generation.tokens_completion is not None:
+            self.metrics.inc("zork_tokens_total", generation.tokens_completion, model=model_name, kind="completion")
+        budget.charge(model_name, projected, generation.tokens_prompt, generation.tokens_completion)
+        generation.tokens_estimated = projected
+        return generation
+
+    def _generate_command(
+        self,
+        state: GameState,
+        model_name: str,
+        validator: CommandValidator,
+        budget: TokenBudget,
+    ) -> Optional[LLMGeneration]:
+        """Ask the model for a command, re-prompting locally while it fails validation.
+
+        Token counts are summed over every attempt. If the model keeps producing
+        invalid commands, or the budget does not cover another attempt, the last
+        one is sent anyway and the game has the final say. Returns ``None`` when
+        the budget does not cover even the first call.
+        """
+        prompt = build_prompt(state, model_name=model_name)
+        generation = self._request(prompt, model_name, budget)
+        if generation is None:
+            return None
+        rejected = []
+        for _ in range(self.max_invalid_retries):
+            verdict = validator.validate(generation.action)
+            if verdict.valid:
+                break
+            print(f"[INFO] Rejected command '{generation.action}': {verdict.reason}")
+            rejected.append((generation.action, verdict.reason))
+            self.metrics.inc("zork_invalid_commands_total", model=model_name)
+            prompt = build_prompt(state, model_name=model_name, rejected=rejected)
+            retry = self._request(prompt, model_name, budget)
+            if retry is None:
+                break
+            generation = LLMGeneration(
+                action=retry.action,
+                tokens_prompt=_add_tokens(generation.tokens_prompt, retry.tokens_prompt),
+                tokens_completion=_add_tokens(generation.tokens_completion, retry.tokens_completion),
+                tokens_estimated=_add_tokens(generation.tokens_estimated, retry.tokens_estimated),
+            )
+        return generation
 
     def run_episode(
         self,
@@ -57,29 +159,82 @@ class GameManager:
         game: str,
         episode_index: int | None = None,
         seed: str | None = None,
+        token_budget: TokenBudget | None = None,
+        lease: GameLease | None = None,
+    ) -> EpisodeResult:
+        """Play one episode.
 
+        ``token_budget`` is shared across episodes by the scheduler; when the
+        next LLM call would exceed it the episode stops early and is marked
+        ``truncated_by_budget``. If not even the first call fits, no game is
+        started and :class:`TokenBudgetExceeded` is raised. With a ``lease``
+        from a :class:`SessionPool` the episode plays the already started game
+        under the lease's email instead of starting a new one.
+        """
+        with self.metrics.tracking("zork_episodes_active", model=model_name):
+            return self._play_episode(
+                model_name=model_name,
+                max_moves=max_moves,
+                rate_limit=rate_limit,
+                run_id=run_id,
+                email=email,
+                game=game,
+                episode_index=episode_index,
+                seed=seed,
+                budget=token_budget or TokenBudget(),
+                lease=lease,
+            )
+
+    def _play_episode(
+        self,
+        model_name: str,
+        max_moves: int,
+        rate_limit: int,
+        run_id: str,
+        email: str,
+        game: str,
+        episode_index: int | None,
+        seed: str | None,
+        budget: TokenBudget,
+        lease: GameLease | None,
     ) -> EpisodeResult:
-        session_id = self.env.new_game(email, game)
+        opening_call = opening_call_tokens(model_name, budget)
+        if not budget.can_afford(model_name, opening_call):
+            raise TokenBudgetExceeded(f"{model_name} cannot afford its first call (~{opening_call} tokens)")
+        if lease is not None:
+            email, session_id = lease.email, lease.session_id
+        else:
+            session_id = self._env_call("new_game", self.env.new_game, email, game)
         episode_id = str(uuid.uuid4())
         state = GameState(session_id=session_id, history=[])
+        validator = CommandValidator()
         last_step: Optional[ZorkStepResult] = None
 
         score_accumulator = 0
         moves_accumulator = 0
         moves_counter = 0
+        tokens_projected = 0
+        tokens_actual = 0
+        truncated_by_budget = False
 
         for move_idx in range(max_moves):
-            prompt = build_prompt(state, model_name=model_name)
-            generation: LLMGeneration = generate_action(model_name=model_name, prompt=prompt)
-            command = generation.action
-
             if move_idx > 0 and move_idx % 5 == 0:
+                # The command is fixed on score-check turns, so skip the LLM entirely.
                 print(f"[INFO] Checking Score")
-                command = "score"
-                
-            sleep(rate_limit)
+                generation = LLMGeneration(action="score")
+            else:
+                generation = self._generate_command(state, model_name, validator, budget)
+                if generation is None:
+                    truncated_by_budget = True
+                    break
+            tokens_projected += generation.tokens_estimated or 0
+            tokens_actual += (generation.tokens_prompt or 0) + (generation.tokens_completion or 0)
+            command = generation.action
 
-            step_result = self.env.step(email, game, command)
+            self._wait_for_rate_limit(rate_limit)
+
+            step_result = self._env_call("step", self.env.step, email, game, command)
+            self.metrics.inc("zork_moves_total", model=model_name)
             # pp(step_result)
             if step_result.raw_response['score'] > 0:
                 score_accumulator = step_result.raw_response['score']
@@ -88,10 +243,19 @@ class GameManager:
                 moves_counter = moves_accumulator
             else:
                 moves_counter += 1
+            self.metrics.set(
+                "zork_score",
+                score_accumulator,
+                model=model_name,
+                episode=episode_index if episode_index is not None else "",
+            )
             print(f"Score: {score_accumulator}")
             # print(f"Moves: {moves_accumulator}")
             print(f"Moves: {moves_counter}")
             state.update(step_result, command)
+            validator.observe(step_result.observation, command=command)
+            if step_result.inventory:
+                validator.observe(" ".join(step_result.inventory))
             last_step = step_result
 
             self.log_manager.log_move(
@@ -115,6 +279,10 @@ class GameManager:
                 break
 
         ended_naturally = bool(last_step and last_step.done)
+        if truncated_by_budget:
+            self.metrics.inc("zork_budget_truncations_total", model=model_name)
+        end_state = "natural" if ended_naturally else "token_budget" if truncated_by_budget else "max_moves"
+        self.metrics.inc("zork_episodes_total", model=model_name, end=end_state)
         final_score = score_accumulator
         return EpisodeResult(
             model_name=model_name,
@@ -123,4 +291,7 @@ class GameManager:
             moves=moves_counter,
             ended_naturally=ended_naturally,
             log_path=self.log_manager.log_path,
+            tokens_projected=tokens_projected,
+            tokens_actual=tokens_actual,
+            truncated_by_budget=truncated_by_budget,
         )
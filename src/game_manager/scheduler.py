@@ -0,0 +1,148 @@
+"""Budget-aware scheduling of episodes across one or more models."""
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from game_manager.manager import EpisodeResult, GameManager, opening_call_tokens
+from llm_runner.tokens import TokenBudget, TokenBudgetExceeded
+from zork_api_adapter.pool import SessionPool
+
+
+@dataclass
+class EpisodeJob:
+    model_name: str
+    episode_index: int
+
+
+@dataclass
+class ScheduleReport:
+    results: List[EpisodeResult] = field(default_factory=list)
+    skipped: List[EpisodeJob] = field(default_factory=list)
+
+
+class EpisodeScheduler:
+    """Runs episodes round-robin across models while respecting a token budget.
+
+    Before each episode the scheduler projects its cost. Episodes that do not
+    fit in what is left of their model's budget are moved behind those that
+    do; once only such episodes remain they are still started (and truncated
+    by the manager when the budget runs out). Episodes whose model cannot
+    afford even a single call are skipped.
+
+    With ``workers > 1`` episodes run concurrently and a ``session_pool``
+    with at least ``workers`` identities is required so each one plays its
+    own pre-started ZorkAPI game. Projections only see
+    tokens already spent, so concurrent episodes can jointly overshoot the
+    projection and are then truncated by the manager.
+    """
+
+    def __init__(
+        self,
+        manager: GameManager,
+        token_budget: Optional[TokenBudget] = None,
+        workers: int = 1,
+        session_pool: Optional[SessionPool] = None,
+    ):
+        if workers > 1 and (session_pool is None or len(session_pool.identities) < workers):
+            # ZorkAPI keys games by email, so concurrent episodes each need their own identity.
+            raise ValueError("workers > 1 needs a session_pool with at least one identity per worker")
+        self.manager = manager
+        self.token_budget = token_budget or TokenBudget()
+        self.workers = workers
+        self.session_pool = session_pool
+        # Jobs not yet started by the current run().
+        self._queue: List[EpisodeJob] = []
+
+    def project_episode(self, model_name: str, max_moves: int) -> int:
+        """Rough token cost of a full episode for ``model_name``.
+
+        Uses the average cost per call seen so far for the model, which already
+        reflects prompt growth over an episode. Before any call has been made
+        the opening prompt is used, which underestimates long episodes.
+        """
+        per_call = self.token_budget.tokens_per_call(model_name)
+        if per_call is None:
+            per_call = opening_call_tokens(model_name, self.token_budget)
+        return per_call * max_moves
+
+    def _can_start(self, model_name: str) -> bool:
+        return self.token_budget.can_afford(model_name, opening_call_tokens(model_name, self.token_budget))
+
+    def _next_job(self, queue: List[EpisodeJob], max_moves: int) -> Optional[EpisodeJob]:
+        for job in queue:
+            if self.token_budget.can_afford(job.model_name, self.project_episode(job.model_name, max_moves)):
+                return job
+        startable = [job for job in queue if self._can_start(job.model_name)]
+        if not startable:
+            return None
+        # Nothing fits completely; give the model with the most headroom a truncated episode.
+        return max(startable, key=lambda job: self.token_budget.remaining(job.model_name) or 0)
+
+    def _run_job(self, job: EpisodeJob, max_moves: int, episode_kwargs: Dict) -> Optional[EpisodeResult]:
+        """Run one episode, or return ``None`` if the budget ran out before it started."""
+        if not self._can_start(job.model_name):
+            # Checked before leasing so an unaffordable episode never holds a pooled game.
+            print(f"[INFO] Skipping episode {job.episode_index} of {job.model_name}: token budget exhausted")
+            return None
+        lease = self.session_pool.lease() if self.session_pool is not None else None
+        played = True
+        try:
+            return self.manager.run_episode(
+                model_name=job.model_name,
+                max_moves=max_moves,
+                episode_index=job.episode_index,
+                token_budget=self.token_budget,
+                lease=lease,
+                **episode_kwargs,
+            )
+        except TokenBudgetExceeded as e:
+            # Another worker spent the budget between the check above and the lease.
+            print(f"[INFO] Skipping episode {job.episode_index} of {job.model_name}: {e}")
+            played = False
+            return None
+        finally:
+            if lease is not None:
+                # Once nothing is waiting to run, a fresh game would never be leased.
+                self.session_pool.release(lease, recycle=bool(self._queue), played=played)
+
+    def run(self, models: List[str], episodes: int, max_moves: int, **episode_kwargs) -> ScheduleReport:
+        """Run ``episodes`` episodes per model; ``episode_kwargs`` go to ``run_episode``.
+
+        Up to ``workers`` episodes run at once. Results are reported in the
+        order episodes finish.
+        """
+        queue = self._queue = [
+            EpisodeJob(model_name=model_name, episode_index=episode_idx)
+            for episode_idx in range(episodes)
+            for model_name in models
+        ]
+        report = ScheduleReport()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running: Dict[Future, EpisodeJob] = {}
+            while queue or running:
+                while queue and len(running) < self.workers:
+                    job = self._next_job(queue, max_moves)
+                    if job is None:
+                        # Spend only grows, so these episodes will never fit.
+                        report.skipped.extend(queue)
+                        queue.clear()
+                        break
+                    queue.remove(job)
+                    running[executor.submit(self._run_job, job, max_moves, episode_kwargs)] = job
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    result = future.result()
+                    if result is None:
+                        report.skipped.append(job)
+                    else:
+                        report.results.append(result)
+        return report
+
+    def usage_summary(self) -> Dict[str, Dict[str, int]]:
+        """Projected vs. actual tokens per model for the run summary."""
+        return self.token_budget.usage()
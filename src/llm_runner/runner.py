@@ -11,6 +11,8 @@ class LLMGeneration:
     action: str
     tokens_prompt: Optional[int] = None
     tokens_completion: Optional[int] = None
+    # Local pre-call estimate (prompt + expected completion), set by the caller.
+    tokens_estimated: Optional[int] = None
 
 
 def _clean_action(text: str) -> str:
@@ -0,0 +1,132 @@
+"""Local token estimation and per-run / per-model token budgets.
+
+``response.usage`` only tells us what a call cost after it was made. The
+helpers here estimate a prompt before it is sent so the episode loop and the
+scheduler can stop short of a provider quota instead of running into it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+import threading
+from typing import Dict, Optional
+
+# Rough characters-per-token ratio for English text when tiktoken is unavailable.
+CHARS_PER_TOKEN = 4
+# Completion estimate used until a model has reported real completion counts.
+DEFAULT_COMPLETION_TOKENS = 64
+
+_ENCODINGS: Dict[str, object] = {}
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when an episode cannot afford even its first LLM call."""
+
+
+def _encoding_for(model_name: str):
+    if model_name not in _ENCODINGS:
+        try:
+            import tiktoken  # Optional; falls back to a character heuristic.
+        except ImportError:
+            _ENCODINGS[model_name] = None
+        else:
+            try:
+                _ENCODINGS[model_name] = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                _ENCODINGS[model_name] = tiktoken.get_encoding("o200k_base")
+    return _ENCODINGS[model_name]
+
+
+def estimate_tokens(text: str, model_name: str) -> int:
+    """Estimate how many tokens ``text`` costs as a prompt for ``model_name``."""
+    encoding = _encoding_for(model_name)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+@dataclass
+class TokenBudget:
+    """Tracks token spend against an optional run limit and per-model limits.
+
+    Spend is charged with the provider-reported usage when available and the
+    local estimate otherwise. Projected (estimated) and actual totals are kept
+    separately per model so they can be compared in the run summary.
+    """
+
+    run_limit: Optional[int] = None
+    model_limits: Dict[str, int] = field(default_factory=dict)
+    used: Dict[str, int] = field(default_factory=dict)
+    projected: Dict[str, int] = field(default_factory=dict)
+    actual: Dict[str, int] = field(default_factory=dict)
+    calls: Dict[str, int] = field(default_factory=dict)
+    completion_tokens: Dict[str, int] = field(default_factory=dict)
+    completion_calls: Dict[str, int] = field(default_factory=dict)
+    # Concurrent episodes charge the same budget.
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def remaining(self, model_name: str) -> Optional[int]:
+        """Tokens left for ``model_name`` under both limits, or ``None`` if unlimited."""
+        limits = []
+        with self._lock:
+            if self.run_limit is not None:
+                limits.append(self.run_limit - sum(self.used.values()))
+            if model_name in self.model_limits:
+                limits.append(self.model_limits[model_name] - self.used.get(model_name, 0))
+        return min(limits) if limits else None
+
+    def can_afford(self, model_name: str, tokens: int) -> bool:
+        remaining = self.remaining(model_name)
+        return remaining is None or tokens <= remaining
+
+    def estimate_completion(self, model_name: str) -> int:
+        """Average reported completion size for the model, or a default guess."""
+        with self._lock:
+            calls = self.completion_calls.get(model_name, 0)
+            tokens = self.completion_tokens.get(model_name, 0)
+        if not calls:
+            return DEFAULT_COMPLETION_TOKENS
+        return math.ceil(tokens / calls)
+
+    def tokens_per_call(self, model_name: str) -> Optional[int]:
+        """Average charged tokens per call so far, or ``None`` before the first call."""
+        with self._lock:
+            calls = self.calls.get(model_name, 0)
+            used = self.used.get(model_name, 0)
+        if not calls:
+            return None
+        return math.ceil(used / calls)
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """Consistent per-model snapshot of projected, actual, and charged tokens."""
+        with self._lock:
+            return {
+                model_name: {
+                    "projected": self.projected.get(model_name, 0),
+                    "actual": self.actual.get(model_name, 0),
+                    "charged": self.used.get(model_name, 0),
+                    "calls": calls,
+                }
+                for model_name, calls in sorted(self.calls.items())
+            }
+
+    def charge(
+        self,
+        model_name: str,
+        projected: int,
+        tokens_prompt: Optional[int],
+        tokens_completion: Optional[int],
+    ) -> None:
+        """Record one LLM call."""
+        with self._lock:
+            self.projected[model_name] = self.projected.get(model_name, 0) + projected
+            self.calls[model_name] = self.calls.get(model_name, 0) + 1
+            if tokens_prompt is None and tokens_completion is None:
+                charged = projected
+            else:
+                charged = (tokens_prompt or 0) + (tokens_completion or 0)
+                self.actual[model_name] = self.actual.get(model_name, 0) + charged
+            if tokens_completion is not None:
+                self.completion_tokens[model_name] = self.completion_tokens.get(model_name, 0) + tokens_completion
+                self.completion_calls[model_name] = self.completion_calls.get(model_name, 0) + 1
+            self.used[model_name] = self.used.get(model_name, 0) + charged
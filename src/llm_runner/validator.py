@@ -0,0 +1,184 @@
+"""Local Zork I command validation.
+
+Catching commands the Zork parser would reject before they are sent saves a
+full ``env.step`` round trip, the rate-limit sleep, and a wasted game move.
+The check is deliberately lenient: it only rejects commands whose verb or
+words are unknown to Zork I and have not appeared in any observation so far.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import re
+from typing import Iterable, Optional, Set
+
+# Zork I only looks at the first six letters of each word ("lantern" and
+# "lanter" are the same word), so all lookups are done on truncated words.
+WORD_LENGTH = 6
+
+DIRECTIONS = {
+    "north", "n", "south", "s", "east", "e", "west", "w",
+    "northeast", "ne", "northwest", "nw", "southeast", "se", "southwest", "sw",
+    "up", "u", "down", "d", "in", "inside", "out", "outside", "land",
+}
+
+VERBS = {
+    "again", "g", "activate", "answer", "reply", "apply", "attach", "attack",
+    "kill", "fight", "hit", "hurt", "injure", "murder", "slay", "dispatch",
+    "stab", "awaken", "wake", "surprise", "startle", "bite", "blast", "blow",
+    "board", "brandish", "wave", "brief", "brush", "burn", "ignite",
+    "incinerate", "carry", "catch", "chant", "incant", "chase", "follow",
+    "pursue", "chomp", "chuck", "climb", "scale", "close", "shut", "come",
+    "consume", "count", "cross", "ford", "curse", "damn", "cut", "slice",
+    "deflate", "describe", "diagnose", "dig", "disembark", "dive", "douse",
+    "extinguish", "drink", "imbibe", "swallow", "drop", "release", "eat",
+    "gobble", "munch", "taste", "echo", "empty", "enter", "examine", "what",
+    "whats", "exit", "fasten", "secure", "tie", "feed", "feel", "touch", "rub",
+    "pat", "pet", "fill", "find", "where", "seek", "fix", "glue", "patch",
+    "plug", "repair", "flip", "set", "turn", "frobozz", "get", "take", "grab",
+    "hold", "remove", "give", "donate", "offer", "go", "walk", "run",
+    "proceed", "step", "hatch", "hello", "hi", "help", "hide", "hop", "skip",
+    "hurl", "throw", "toss", "inflate", "pump", "insert", "put", "place",
+    "stuff", "lay", "inventory", "i", "jump", "leap", "kick", "kiss", "knock",
+    "rap", "launch", "lean", "leave", "lift", "raise", "light", "listen",
+    "lock", "look", "l", "stare", "gaze", "lower", "lubricate", "oil",
+    "grease", "make", "melt", "liquify", "move", "pull", "tug", "yank",
+    "mumble", "sigh", "odysseus", "ulysses", "open", "pick", "play", "poke",
+    "jab", "pierce", "pour", "spill", "pray", "push", "press", "read", "skim",
+    "ring", "peal", "say", "score", "script", "unscript", "search", "send",
+    "shake", "sit", "smell", "sniff", "spin", "squeeze", "stand", "stay",
+    "strike", "swim", "wade", "swing", "thrust", "talk", "tell", "temple",
+    "think", "treasure", "unfasten", "untie", "free", "unlock", "verbose",
+    "superbrief", "version", "wait", "z", "wear", "wind", "wish", "xyzzy",
+    "plugh", "yell", "scream", "shout", "zork", "save", "restore", "restart",
+    "quit", "q", "destroy", "break", "smash",
+}
+
+NOUNS = {
+    "advertisement", "air", "altar", "axe", "bag", "bar", "basket", "bat",
+    "bauble", "beetle", "bell", "bird", "boat", "bolt", "bones", "book",
+    "bottle", "boulder", "bracelet", "broken", "bubble", "buoy", "button",
+    "buttons", "candle", "candles", "canary", "canyon", "carpet", "case",
+    "ceiling", "chain", "chalice", "chimney", "cliff", "coal", "coffin",
+    "coins", "crystal", "cyclops", "dam", "diamond", "door", "egg", "emerald",
+    "engravings", "figurine", "floor", "food", "forest", "garlic", "gate",
+    "gates", "ghosts", "grate", "grating", "ground", "guidebook", "gunk",
+    "hands", "hole", "hook", "house", "inscription", "jade", "jewel",
+    "jewels", "key", "keys", "kitchen", "knife", "label", "ladder", "lake",
+    "lamp", "lantern", "leaflet", "leaves", "ledge", "lid", "lunch",
+    "machine", "mailbox", "map", "match", "matchbook", "matches", "mirror",
+    "nest", "opening", "painting", "pamphlet", "panel", "passage", "path",
+    "pedestal", "pile", "pot", "prayer", "putty", "railing", "rainbow",
+    "reservoir", "river", "rock", "rope", "rug", "sack", "sand", "sandwich",
+    "sapphire", "scarab", "sceptre", "scepter", "screwdriver", "shovel",
+    "skeleton", "skull", "slide", "sluice", "songbird", "spirits", "stairs",
+    "staircase", "stiletto", "stream", "switch", "sword", "table", "thief",
+    "timber", "toothpaste", "torch", "trap", "trapdoor", "tree", "trees",
+    "trident", "troll", "trophy", "tube", "wall", "walls", "water", "window",
+    "wrench", "me", "myself", "self", "all", "everything", "it", "them",
+    "him", "her",
+}
+
+ADJECTIVES = {
+    "ancient", "black", "blue", "brass", "brown", "burned", "clear",
+    "crystal", "dead", "elvish", "encrusted", "front", "glass", "gold",
+    "golden", "green", "huge", "ivory", "jeweled", "jewel-encrusted",
+    "large", "leather", "living", "magic", "nasty", "old", "pearl",
+    "platinum", "red", "rusty", "sharp", "silver", "small", "smelly",
+    "solid", "tan", "white", "wooden", "yellow",
+}
+
+FILLER_WORDS = {
+    "the", "a", "an", "with", "to", "into", "on", "onto", "at", "from",
+    "under", "underneath", "below", "beneath", "behind", "over", "across",
+    "through", "around", "off", "of", "for", "about", "and", "then", "but",
+    "except", "some", "one", "here", "there", "away", "together",
+}
+
+# Parser complaints from Zork; they quote the offending words back, so they
+# must not be learned as vocabulary.
+PARSER_ERRORS = (
+    "i don't know the word",
+    "that sentence isn't one i recognize",
+    "i don't understand that sentence",
+    "there was no verb in that sentence",
+    "you used the word",
+    "i beg your pardon",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'-]*")
+_QUOTED_RE = re.compile(r"\"[^\"]*\"?")
+_CLAUSE_SPLIT_RE = re.compile(r"\.|\bthen\b")
+
+
+def _key(word: str) -> str:
+    # Apostrophes are not part of Zork words ("owner's" is looked up as "owner").
+    return word.removesuffix("'s").replace("'", "")[:WORD_LENGTH]
+
+
+def _truncate(words: Iterable[str]) -> Set[str]:
+    return {_key(word) for word in words}
+
+
+@dataclass
+class ValidationResult:
+    valid: bool
+    reason: Optional[str] = None
+
+
+@dataclass
+class CommandValidator:
+    """Checks commands against Zork I vocabulary plus words seen in play.
+
+    Call :meth:`observe` with every observation (and inventory) so nouns the
+    game has mentioned, such as room contents, are accepted as well.
+    """
+
+    observed_words: Set[str] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self._verbs = _truncate(VERBS | DIRECTIONS)
+        self._vocabulary = _truncate(VERBS | DIRECTIONS | NOUNS | ADJECTIVES | FILLER_WORDS)
+
+    def observe(self, text: Optional[str], command: Optional[str] = None) -> None:
+        """Add the words of an observation to the known vocabulary.
+
+        ZorkAPI echoes the command as the first line of its output; pass
+        ``command`` so that echo is dropped. Parser error replies are ignored
+        entirely so a rejected word is never learned from the game's complaint.
+        """
+        if not text:
+            return
+        text = text.lower()
+        if command is not None:
+            first_line, _, rest = text.lstrip().partition("\n")
+            if first_line.strip() == command.strip().lower():
+                text = rest
+        if any(error in text for error in PARSER_ERRORS):
+            return
+        self.observed_words |= _truncate(_TOKEN_RE.findall(text))
+
+    def validate(self, command: str) -> ValidationResult:
+        """Return whether ``command`` is likely to be understood by Zork I."""
+        # Double-quoted text (e.g. ``say "echo"``) is passed through by the game
+        # verbatim; single quotes are left alone since they are usually apostrophes.
+        text = _QUOTED_RE.sub(" ", command.lower()).replace(",", " ")
+        clauses = [clause for clause in _CLAUSE_SPLIT_RE.split(text) if clause.strip()]
+        if not clauses:
+            return ValidationResult(valid=False, reason="The command is empty.")
+
+        for clause in clauses:
+            words = _TOKEN_RE.findall(clause)
+            if not words:
+                continue
+            if _key(words[0]) not in self._verbs:
+                return ValidationResult(
+                    valid=False,
+                    reason=f"\"{words[0]}\" is not a verb Zork I understands.",
+                )
+            for word in words[1:]:
+                key = _key(word)
+                if word.isdigit() or key in self._vocabulary or key in self.observed_words:
+                    continue
+                return ValidationResult(valid=False, reason=f"I don't know the word \"{word}\".")
+
+        return ValidationResult(valid=True)
@@ -1,7 +1,7 @@
 """Dynamic prompt templates for driving the Zork-playing agent."""
 from __future__ import annotations
 
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:  # pragma: no cover - only for type hints
     from game_manager.manager import GameState
@@ -22,12 +22,24 @@ def _format_history(history: List[dict], max_turns: int = 500) -> str:
     return "\n\n".join(lines)
 
 
-def build_prompt(game_state: "GameState", model_name: str) -> str:
+def _format_rejections(rejected: List[Tuple[str, str]]) -> str:
+    lines = [f"Your reply '{command}' was rejected: {reason}" for command, reason in rejected]
+    lines.append("Respond with a different command that uses words Zork I understands.")
+    return "\n".join(lines)
+
+
+def build_prompt(
+    game_state: "GameState",
+    model_name: str,
+    rejected: Optional[List[Tuple[str, str]]] = None,
+) -> str:
     """Construct a concise prompt summarizing the current game state.
 
     The prompt instructs the model to emit exactly one command for Zork I. It is
     intentionally compact to keep token counts small while still providing
-    useful context (score, inventory, recent history).
+    useful context (score, inventory, recent history). ``rejected`` lists
+    ``(command, reason)`` pairs that failed local validation this turn so the
+    model can correct itself without a round trip to the game.
     """
 
     history_block = _format_history(game_state.history)
@@ -79,5 +91,7 @@ def build_prompt(game_state: "GameState", model_name: str) -> str:
         "Recent turns:\n"
         f"{history_block}\n"
     )
+    if rejected:
+        prompt += f"\n{_format_rejections(rejected)}\n"
     return prompt
 
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import csv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+import threading
 from typing import Optional
 
 
@@ -15,6 +16,8 @@ DEFAULT_LOG_DIR = Path("data/raw_runs")
 class LogManager:
     log_dir: Path = DEFAULT_LOG_DIR
     log_filename: Optional[str] = None
+    # Episodes may run concurrently and share one CSV file.
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -83,6 +86,6 @@ class LogManager:
             tokens_prompt if tokens_prompt is not None else "",
             tokens_completion if tokens_completion is not None else "",
         ]
-        with self.log_path.open("a", newline="") as f:
+        with self._lock, self.log_path.open("a", newline="") as f:
             writer = csv.writer(f)
             writer.writerow(row)
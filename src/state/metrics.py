@@ -0,0 +1,238 @@
+"""Live metrics for running experiments in Prometheus text format.
+
+A :class:`MetricsRegistry` collects counters, gauges, and histograms from the
+episode loop. :class:`MetricsExporter` publishes the registry either as an
+HTTP endpoint on localhost or as a periodically rewritten stats file, so
+throughput and stalls can be watched without parsing stdout.
+"""
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Window used for the derived moves/sec and tokens/min gauges.
+RATE_WINDOW_SECONDS = 60.0
+
+# name -> (type, help)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "zork_moves_total": ("counter", "Commands sent to the Zork environment."),
+    "zork_episodes_active": ("gauge", "Episodes currently running."),
+    "zork_episodes_total": ("counter", "Finished episodes by end state."),
+    "zork_score": ("gauge", "Latest known score of an episode."),
+    "zork_llm_calls_total": ("counter", "LLM calls made."),
+    "zork_llm_latency_seconds": ("histogram", "Wall time of one LLM call."),
+    "zork_tokens_total": ("counter", "Tokens reported by the LLM provider."),
+    "zork_invalid_commands_total": ("counter", "Commands rejected by local validation and re-prompted."),
+    "zork_budget_truncations_total": ("counter", "Episodes stopped early by the token budget."),
+    "zork_env_latency_seconds": ("histogram", "Wall time of one ZorkAPI request."),
+    "zork_env_errors_total": ("counter", "ZorkAPI requests that raised an error."),
+    "zork_pool_start_retries_total": ("counter", "Pooled game starts retried after an error."),
+    "zork_pool_identities_dropped_total": ("counter", "Identities removed from the session pool after repeated errors."),
+    "zork_moves_per_second": ("gauge", "Moves per second over the last minute."),
+    "zork_tokens_per_minute": ("gauge", "Tokens per minute over the last minute."),
+    "zork_uptime_seconds": ("gauge", "Seconds since the metrics registry was created."),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Thread-safe store of the metrics declared in :data:`METRICS`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> label key -> (bucket counts, sum, count)
+        self._histograms: Dict[str, Dict[LabelKey, Tuple[List[int], float, int]]] = {}
+        self._recent_moves: Deque[float] = deque()
+        self._recent_tokens: Deque[Tuple[float, int]] = deque()
+
+    def _check(self, name: str, kind: str) -> None:
+        if METRICS.get(name, (None,))[0] != kind:
+            raise ValueError(f"{name} is not a declared {kind}")
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Increment a counter or gauge."""
+        if METRICS.get(name, (None,))[0] not in {"counter", "gauge"}:
+            raise ValueError(f"{name} is not a declared counter or gauge")
+        key = _label_key(labels)
+        now = time.monotonic()
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+            if name == "zork_moves_total":
+                self._recent_moves.append(now)
+            elif name == "zork_tokens_total":
+                self._recent_tokens.append((now, int(amount)))
+
+    def dec(self, name: str, amount: float = 1, **labels) -> None:
+        self._check(name, "gauge")
+        self.inc(name, -amount, **labels)
+
+    @contextmanager
+    def tracking(self, name: str, **labels) -> Iterator[None]:
+        """Hold a gauge one higher for the duration of the ``with`` block."""
+        self.inc(name, **labels)
+        try:
+            yield
+        finally:
+            self.dec(name, **labels)
+
+    @contextmanager
+    def timing(self, histogram: str, errors: Optional[str] = None, **labels) -> Iterator[None]:
+        """Observe the block's wall time in ``histogram``; count exceptions in ``errors``."""
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            if errors is not None:
+                self.inc(errors, **labels)
+            raise
+        finally:
+            self.observe(histogram, time.monotonic() - started, **labels)
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self._check(name, "gauge")
+        with self._lock:
+            self._values.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation in a histogram."""
+        self._check(name, "histogram")
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            buckets, total, count = series.get(key, ([0] * len(LATENCY_BUCKETS), 0.0, 0))
+            buckets = [n + (value <= bound) for n, bound in zip(buckets, LATENCY_BUCKETS)]
+            series[key] = (buckets, total + value, count + 1)
+
+    def _update_rates(self, now: float) -> None:
+        cutoff = now - RATE_WINDOW_SECONDS
+        while self._recent_moves and self._recent_moves[0] < cutoff:
+            self._recent_moves.popleft()
+        while self._recent_tokens and self._recent_tokens[0][0] < cutoff:
+            self._recent_tokens.popleft()
+        window = min(RATE_WINDOW_SECONDS, max(now - self._started, 1e-9))
+        tokens = sum(amount for _, amount in self._recent_tokens)
+        self._values["zork_moves_per_second"] = {(): len(self._recent_moves) / window}
+        self._values["zork_tokens_per_minute"] = {(): tokens * 60.0 / window}
+        self._values["zork_uptime_seconds"] = {(): now - self._started}
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            self._update_rates(time.monotonic())
+            for name, (kind, help_text) in METRICS.items():
+                if name not in self._values and name not in self._histograms:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind != "histogram":
+                    for key, value in sorted(self._values[name].items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                for key, (buckets, total, count) in sorted(self._histograms[name].items()):
+                    for bound, n in zip(LATENCY_BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {n}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Publishes a :class:`MetricsRegistry` over HTTP and/or to a stats file.
+
+    Both outputs run on daemon threads so they never keep a finished run alive.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._path: Optional[Path] = None
+        self._writer: Optional[threading.Thread] = None
+        # Serializes writers sharing ``<path>.tmp``.
+        self._write_lock = threading.Lock()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve ``/metrics`` on ``host:port``."""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path.rstrip("/") not in {"", "/metrics"}:
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                # Keep scrapes out of the experiment's stdout.
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def write_periodically(self, path: Path, interval: float = 5.0) -> None:
+        """Rewrite ``path`` with the current metrics every ``interval`` seconds."""
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self.write(self._path)
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                self.write(self._path)
+
+        self._writer = threading.Thread(target=loop, daemon=True)
+        self._writer.start()
+
+    def write(self, path: Path) -> None:
+        """Atomically replace ``path`` with the current metrics."""
+        tmp_path = Path(f"{path}.tmp")
+        with self._write_lock:
+            tmp_path.write_text(self.registry.render())
+            os.replace(tmp_path, path)
+
+    def stop(self) -> None:
+        """Stop publishing; the stats file is left with the final values."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self._path is not None:
+            self.write(self._path)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
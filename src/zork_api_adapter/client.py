@@ -8,6 +8,7 @@ end-to-end loop runnable.
 from __future__ import annotations
 
 from dataclasses import dataclass
+import threading
 from typing import Dict, List, Optional
 import uuid
 from pprint import pprint as pp
@@ -50,29 +51,50 @@ class ZorkEnv:
         Base URL of the ZorkAPI server (e.g., ``"http://localhost:5000"``).
         If ``None``, a :class:`MockZorkEnv` is used instead.
     session: requests.Session | None
-        Optional session for connection pooling.
+        Optional session for connection pooling, used by the thread that
+        creates the environment. ``requests`` sessions are not guaranteed to
+        be thread-safe, so every other thread (concurrent episodes, the
+        session pool) gets its own session.
     """
 
     def __init__(self, base_url: Optional[str] = None, session: Optional[object] = None):
+        self._local = threading.local()
         if base_url is None:
             # Defer to mock environment for offline development.
             self._mock = MockZorkEnv()
             self.base_url = None
-            self.session = None
         else:
-            from requests import Session  # Imported lazily to avoid dependency when mocking.
-
             self._mock = None
             self.base_url = base_url.rstrip("/")
-            self.session = session or Session()
+            self._local.session = session
+
+    @property
+    def session(self):
+        """The calling thread's ``requests.Session`` (``None`` for the mock)."""
+        if self._mock:
+            return None
+        session = getattr(self._local, "session", None)
+        if session is None:
+            from requests import Session  # Imported lazily to avoid dependency when mocking.
 
-    def new_game(self, email, game) -> str:
-        """Start a new game and return its session identifier."""
+            session = self._local.session = Session()
+        return session
+
+    def new_game(self, email, game, register: bool = True) -> str:
+        """Start a new game and return its session identifier.
+
+        ``register`` creates the ZorkAPI user first; callers that already
+        registered ``email`` (e.g. :class:`SessionPool` when recycling a game)
+        can skip that request.
+        """
         if self._mock:
-            return self._mock.new_game()
+            return self._mock.new_game(email)
 
-        response = self.session.post(f"{self.base_url}/user?email={email}", timeout=10)
-        response = self.session.post(f"{self.base_url}/newGame?email={email}&title={game}", timeout=10)
+        if register:
+            response = self.session.post(f"{self.base_url}/user", params={"email": email}, timeout=10)
+        response = self.session.post(
+            f"{self.base_url}/newGame", params={"email": email, "title": game}, timeout=10
+        )
         response.raise_for_status()
         payload = response.json()
         # The ZorkAPI returns the session ID inside the payload; field name may vary.
@@ -87,7 +109,12 @@ class ZorkEnv:
         if self._mock:
             return self._mock.step(email, command)
 
-        response = self.session.post(f"{self.base_url}/action?email={email}&title={game}&action={command}", timeout=10)
+        # Let requests encode the query; commands and identities may contain "+", "&", or spaces.
+        response = self.session.post(
+            f"{self.base_url}/action",
+            params={"email": email, "title": game, "action": command},
+            timeout=10,
+        )
         response.raise_for_status()
         payload = response.json()
         # pp(payload)
@@ -228,8 +255,9 @@ class MockZorkEnv:
     def __init__(self):
         self.sessions: Dict[str, Dict] = {}
 
-    def new_game(self) -> str:
-        session_id = str(uuid.uuid4())
+    def new_game(self, session_id: Optional[str] = None) -> str:
+        # Keyed like ZorkAPI (by the player's email) so steps find their game.
+        session_id = session_id or str(uuid.uuid4())
         self.sessions[session_id] = {
             "moves": 0,
             "score": 0,
@@ -255,7 +283,7 @@ class MockZorkEnv:
             state["done"] = True
 
         payload = {
-            "text": observation,
+            "cmdOutput": observation,
             "score": state["score"],
             "moves": state["moves"],
             "inventory": state["inventory"],
@@ -271,5 +299,11 @@ class MockZorkEnv:
             "There is a grating in the ground, locked tight.",
             "You are inside a mock house with a dusty table.",
         ]
+        if command.strip().lower() == "score":
+            # Mirror the real game's wording so _parse_response can read it.
+            return (
+                f"Your score is {state['score']} (total of 350 points), in {state['moves']} moves.\n"
+                "This gives you the rank of Beginner."
+            )
         snippet = templates[state["moves"] % len(templates)]
         return f"Command '{command}' processed. {snippet} (mock turn {state['moves']})."
@@ -0,0 +1,135 @@
+"""Pre-warmed pool of ZorkAPI games for concurrent episodes.
+
+ZorkAPI keys each game by a single email, so one identity can only play one
+episode at a time and every episode pays for the ``/user`` and ``/newGame``
+requests up front. The pool starts games for a set of worker identities in the
+background, leases a ready one to each episode, and starts a fresh game for
+that identity once the episode releases it.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from state.metrics import MetricsRegistry
+from zork_api_adapter.client import ZorkEnv
+
+# Attempts to (re)start a game for one identity before it is dropped from the pool.
+MAX_START_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 2.0
+
+
+@dataclass
+class GameLease:
+    """A ready game handed to one episode."""
+
+    email: str
+    session_id: str
+
+
+def worker_identities(email: str, count: int) -> List[str]:
+    """Derive ``count`` distinct ZorkAPI identities from a base ``email``.
+
+    The suffix goes before the domain of an address (``me-w0@example.com``)
+    and after a plain name (``me-w0``).
+    """
+    local, at, domain = email.partition("@")
+    return [f"{local}-w{idx}{at}{domain}" for idx in range(count)]
+
+
+class SessionPool:
+    """Leases pre-started games under a fixed set of identities.
+
+    Parameters
+    ----------
+    env: ZorkEnv
+        Environment used to start games.
+    game: str
+        Game title passed to ZorkAPI (e.g. ``"zork1"``).
+    identities: list[str]
+        One ZorkAPI identity per game slot; see :func:`worker_identities`.
+    metrics: MetricsRegistry | None
+        Registry that receives ``new_game`` latency, errors, and retries.
+    """
+
+    def __init__(
+        self,
+        env: ZorkEnv,
+        game: str,
+        identities: List[str],
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        if not identities:
+            raise ValueError("SessionPool needs at least one identity")
+        self.env = env
+        self.game = game
+        self.identities = list(identities)
+        self.metrics = metrics or MetricsRegistry()
+        self._ready: "queue.Queue[GameLease]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.identities), thread_name_prefix="zork-pool")
+        self._lock = threading.Lock()
+        self._live = len(self.identities)
+        self._registered: set = set()
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        """Begin starting a game for every identity in the background."""
+        for email in self.identities:
+            self._executor.submit(self._prepare, email)
+
+    def _prepare(self, email: str) -> None:
+        for attempt in range(1, MAX_START_ATTEMPTS + 1):
+            try:
+                with self.metrics.timing("zork_env_latency_seconds", "zork_env_errors_total", endpoint="new_game"):
+                    session_id = self.env.new_game(email, self.game, register=email not in self._registered)
+            except Exception as e:
+                print(f"[WARN] Starting game for {email} failed (attempt {attempt}): {e}")
+                if attempt < MAX_START_ATTEMPTS:
+                    self.metrics.inc("zork_pool_start_retries_total")
+                    time.sleep(RETRY_DELAY_SECONDS)
+                continue
+            self._registered.add(email)
+            self._ready.put(GameLease(email=email, session_id=session_id))
+            return
+        print(f"[WARN] Dropping {email} from the session pool")
+        self.metrics.inc("zork_pool_identities_dropped_total")
+        with self._lock:
+            self._live -= 1
+
+    def lease(self, timeout: Optional[float] = None) -> GameLease:
+        """Return a ready game, waiting for one if every game is in use or starting."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._live == 0:
+                    raise RuntimeError("No ZorkAPI identities left in the session pool")
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise TimeoutError("Timed out waiting for a ZorkAPI game")
+            try:
+                return self._ready.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def release(self, lease: GameLease, recycle: bool = True, played: bool = True) -> None:
+        """Hand a game back.
+
+        A game that was never ``played`` goes straight back to the ready
+        queue. Otherwise a fresh game is started for its identity in the
+        background unless ``recycle`` is false (no more episodes will be
+        leased) or the pool is closed.
+        """
+        if self._closed.is_set():
+            return
+        if not played:
+            self._ready.put(lease)
+        elif recycle:
+            self._executor.submit(self._prepare, lease.email)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)